@@ -2,6 +2,7 @@ import sys
 import shutil
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # --- Import modular scripts ---
 from src.fetch_odds_info import run_odds_pipeline
@@ -73,23 +74,25 @@ def main():
 
     validate_project_structure()
 
+    # --- Steps 1 & 2: Fetch Odds + Category Names (independent, run concurrently) ---
+    print_banner("STEP 1️⃣ + 2️⃣  - Fetching Odds and Category Name Data")
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        odds_future = ex.submit(run_odds_pipeline)
+        categories_future = ex.submit(run_category_names_pipeline)
+
     # --- Step 1: Fetch Odds ---
-    try:
-        print_banner("STEP 1️⃣  - Fetching Odds Data")
-        run_odds_pipeline()
-        log("Odds data fetched and saved successfully.", "success")
-    except Exception as e:
+    e = odds_future.exception()
+    if e is not None:
         log(f"Odds fetch failed: {e}", "error")
         sys.exit(1)
+    log("Odds data fetched and saved successfully.", "success")
 
     # --- Step 2: Fetch Category Names ---
-    try:
-        print_banner("STEP 2️⃣  - Fetching Category Name Data")
-        run_category_names_pipeline()
-        log("Category name data fetched and saved successfully.", "success")
-    except Exception as e:
+    e = categories_future.exception()
+    if e is not None:
         log(f"Category name fetch failed: {e}", "error")
         sys.exit(1)
+    log("Category name data fetched and saved successfully.", "success")
 
     # --- Step 3: Combine Odds + Categories ---
     try:
@@ -1,4 +1,5 @@
-import pandas as pd
+import os
+import polars as pl
 from pathlib import Path
 from datetime import datetime
 
@@ -9,10 +10,12 @@ from datetime import datetime
 def get_latest_subdir(path: Path):
     """Return the newest subdirectory in a given path."""
     try:
-        subdirs = [d for d in path.iterdir() if d.is_dir()]
-        if not subdirs:
-            return None
-        return max(subdirs, key=lambda d: d.stat().st_mtime)
+        with os.scandir(path) as it:
+            best = max(
+                ((e.stat().st_mtime, e.path) for e in it if e.is_dir()),
+                default=None
+            )
+        return Path(best[1]) if best else None
     except Exception as e:
         print(f"❌ Error while locating subfolders: {e}")
         return None
@@ -33,33 +36,38 @@ def combine_odds_with_categories():
         print("❌ Missing odds or category data folder. Please run both pipelines first.")
         return
 
-    odds_file = latest_odds / "odds_categories_decoded.json"
-    categories_file = latest_categories / "category_names_raw.json"
+    odds_file = latest_odds / "odds_categories_decoded.parquet"
+    categories_file = latest_categories / "category_names_raw.parquet"
 
     print(f"📂 Using:\n  Odds → {odds_file}\n  Categories → {categories_file}")
 
-    # --- Read JSON files Safely ---
+    # --- Read Parquet files Safely ---
     try:
-        df_odds = pd.read_json(odds_file)
-        df_categories = pd.read_json(categories_file)
+        df_odds = pl.read_parquet(odds_file).to_pandas()
+        df_categories = pl.read_parquet(categories_file).to_pandas()
     except Exception as e:
-        print(f"❌ Error reading one of the JSON files: {e}")
+        print(f"❌ Error reading one of the Parquet files: {e}")
         return
 
     if df_odds.empty or df_categories.empty:
-        print("⚠️ One or both JSON files are empty. Skipping merge.")
+        print("⚠️ One or both Parquet files are empty. Skipping merge.")
         return
 
-    # --- Merge Data ---
+    # Low-cardinality string columns → category dtype (int codes instead of repeated strings)
+    df_odds["fullName"] = df_odds["fullName"].astype("category")
+    for c in ["sport", "group", "category_name"]:
+        df_categories[c] = df_categories[c].astype("category")
+
+    # --- Merge Data (project to the needed columns first to slim the join) ---
     try:
-        df_merged = df_odds.merge(
-            df_categories,
+        df_odds_slim = df_odds[["fullName", "raw", "decoded", "numeric_id"]]
+        df_cats_slim = df_categories[["category_id", "category_name", "group", "sport"]]
+        df_merged = df_odds_slim.merge(
+            df_cats_slim,
             how="left",
             left_on="raw",
             right_on="category_id"
-        )[
-            ["fullName", "raw", "decoded", "numeric_id", "category_name", "group", "sport"]
-        ]
+        ).drop(columns="category_id")
 
         print(f"✅ Successfully merged {len(df_merged)} rows.")
     except Exception as e:
@@ -70,10 +78,10 @@ def combine_odds_with_categories():
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     output_dir = Path("data/processed")
     output_dir.mkdir(parents=True, exist_ok=True)
-    output_path = output_dir / f"player_category_map_{timestamp}.json"
+    output_path = output_dir / f"player_category_map_{timestamp}.parquet"
 
     try:
-        df_merged.to_json(output_path, orient='records', indent=2)
+        pl.from_pandas(df_merged).write_parquet(output_path)
         print(f"📁 Merged data saved → {output_path}")
     except Exception as e:
         print(f"❌ Failed to save merged file: {e}")
@@ -1,8 +1,21 @@
-import base64, zlib, re, struct
+import base64, zlib, re, os, fnmatch
 import numpy as np
 import pandas as pd
+import polars as pl
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+
+# =====================================================
+# 🔹 Category ID Patterns
+# =====================================================
+_CAT_PREFIX = b"Z2lkOi8vaHMzL0NhdGVnb3J5Lz"  # base64 of "gid://hs3/Category/"
+_B64_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/="
+# bytes.translate table: base64 alphabet -> 0x01, anything else -> 0x00
+_B64_TABLE = bytes(1 if b in _B64_ALPHABET else 0 for b in range(256))
+_NUMID_RE = re.compile(r'/Category/(\d+)')
 
 
 # =====================================================
@@ -11,10 +24,12 @@ from datetime import datetime
 def get_latest_file(path: Path, pattern: str):
     """Return latest file matching a pattern (e.g., startswith)."""
     try:
-        files = [f for f in path.glob(pattern) if f.is_file()]
-        if not files:
-            return None
-        return max(files, key=lambda f: f.stat().st_mtime)
+        with os.scandir(path) as it:
+            best = max(
+                ((e.stat().st_mtime, e.path) for e in it if e.is_file() and fnmatch.fnmatch(e.name, pattern)),
+                default=None
+            )
+        return Path(best[1]) if best else None
     except Exception as e:
         print(f"❌ Error scanning files: {e}")
         return None
@@ -23,109 +38,150 @@ def get_latest_file(path: Path, pattern: str):
 # =====================================================
 # 🔹 Decode a Single markets64 String
 # =====================================================
-def decode_market64(encoded_market64):
-    """Decode a single markets64 string and extract numeric_id, final_line, top_values."""
-    if not encoded_market64 or not isinstance(encoded_market64, str):
-        return pd.DataFrame()
-
+def _find_category_ids(data):
+    """Return (offset, raw_bytes) for every base64 category ID in a decoded payload."""
+    flags = data.translate(_B64_TABLE)
+    positions = []
+    i = data.find(_CAT_PREFIX)
+    while i >= 0:
+        start = i + len(_CAT_PREFIX)
+        end = flags.find(b"\x00", start)
+        if end < 0:
+            end = len(data)
+        if end > start:
+            positions.append((i, data[i:end]))
+            i = data.find(_CAT_PREFIX, end)
+        else:
+            i = data.find(_CAT_PREFIX, i + 1)
+    return positions
+
+
+def _process_floats(arr):
+    """Filter a float32 window to plausible lines and return (final_line, top_values)."""
+    absarr = np.abs(arr)
+    vals = np.round(arr[(absarr >= 0.3) & (absarr <= 400.0)].astype(np.float64), 2)
+
+    # Normalize the top 3 values: 10-100 are scaled down, the rest pass through
+    top_vals = np.sort(vals)[::-1][:3]
+    norm_vals = np.where((top_vals >= 10) & (top_vals <= 100), np.round(top_vals / 3.5, 2), top_vals)
+    avg_val = norm_vals.mean() if norm_vals.size else None
+
+    return (float(np.round(avg_val, 2)) if avg_val else None), norm_vals.tolist()
+
+
+@lru_cache(maxsize=4096)
+def _category_numeric_id(cat_bytes):
+    """Return the numeric ID behind a base64 category ID (cached: IDs repeat across players)."""
+    cat_raw = cat_bytes.decode()
+    padded = cat_raw + "=" * (-len(cat_raw) % 4)
     try:
-        decoded = base64.b64decode(encoded_market64)
-        try:
-            data = zlib.decompress(decoded)
-        except zlib.error:
-            data = decoded
+        cat_decoded = base64.b64decode(padded).decode()
     except Exception:
-        return pd.DataFrame()
+        cat_decoded = "(invalid)"
+    num_id = _NUMID_RE.search(cat_decoded)
+    return num_id.group(1) if num_id else None
 
-    cat_positions = [
-        (m.start(), m.group())
-        for m in re.finditer(rb'Z2lkOi8vaHMzL0NhdGVnb3J5Lz[A-Za-z0-9+/=]+', data)
-    ]
-    if not cat_positions:
-        return pd.DataFrame()
 
-    records = []
-    for i, (pos, cat_bytes) in enumerate(cat_positions):
-        next_pos = cat_positions[i + 1][0] if i + 1 < len(cat_positions) else len(data)
-        window = data[pos:next_pos]
+def decode_market64(encoded_market64, data=None):
+    """Decode a single markets64 string into parallel (numeric_ids, final_lines, top_values) lists.
+
+    If `data` (the already-inflated payload) is given, base64 + zlib are skipped.
+    """
+    num_ids, final_lines, top_values_list = [], [], []
+    if data is None:
+        if not encoded_market64 or not isinstance(encoded_market64, str):
+            return num_ids, final_lines, top_values_list
 
-        vals = []
-        for j in range(0, len(window) - 4, 4):
-            try:
-                v = struct.unpack("<f", window[j:j + 4])[0]
-                if 0.3 <= abs(v) <= 400:
-                    vals.append(round(v, 2))
-            except Exception:
-                pass
-
-        cat_raw = cat_bytes.decode()
-        padded = cat_raw + "=" * (-len(cat_raw) % 4)
         try:
-            cat_decoded = base64.b64decode(padded).decode()
+            decoded = base64.b64decode(encoded_market64)
+            try:
+                data = zlib.decompress(decoded)
+            except zlib.error:
+                data = decoded
         except Exception:
-            cat_decoded = "(invalid)"
-        num_id = re.findall(r'/Category/(\d+)', cat_decoded)
-        num_id = num_id[0] if num_id else None
-
-        # Normalize numeric values
-        top_vals = sorted(vals, reverse=True)[:3]
-        norm_vals = []
-        for v in top_vals:
-            if v > 100:
-                norm_vals.append(v)
-            elif 10 <= v <= 100:
-                norm_vals.append(round(v / 3.5, 2))
-            else:
-                norm_vals.append(v)
-        avg_val = np.mean(norm_vals) if norm_vals else None
-
-        records.append({
-            "numeric_id": num_id,
-            "final_line": round(avg_val, 2) if avg_val else None,
-            "top_values": norm_vals
-        })
-
-    return pd.DataFrame(records)
+            return num_ids, final_lines, top_values_list
+
+    cat_positions = _find_category_ids(data)
+    for i, (pos, cat_bytes) in enumerate(cat_positions):
+        next_pos = cat_positions[i + 1][0] if i + 1 < len(cat_positions) else len(data)
+
+        # Read the window as little-endian float32 in one pass; the count
+        # (next_pos - pos - 1) // 4 keeps the old decoder's exclusion of the trailing float
+        nfloats = max(0, (next_pos - pos - 1) // 4)
+        final_line, top_values = _process_floats(
+            np.frombuffer(data, dtype="<f4", count=nfloats, offset=pos)
+        )
+
+        num_ids.append(_category_numeric_id(cat_bytes))
+        final_lines.append(final_line)
+        top_values_list.append(top_values)
+
+    return num_ids, final_lines, top_values_list
 
 
 # =====================================================
 # 🔹 Decode All Players
 # =====================================================
+def _decode_one(job):
+    """Worker for the process pool: decode one (player, markets64, payload) job."""
+    player, encoded_market64, payload = job
+    return player, decode_market64(encoded_market64, payload)
+
+
 def decode_all_players(df_merged, df_markets):
     """Decode markets64 for all players and merge with category mapping."""
-    decoded_results = []
+    df_unique = df_markets.drop_duplicates("fullName").set_index("fullName")
+    markets_by_player = df_unique["markets64"].to_dict()
+    # Inflated payloads saved by the odds step (absent in older runs)
+    payloads_by_player = df_unique["markets_bytes"].to_dict() if "markets_bytes" in df_unique.columns else {}
 
+    jobs = []
     for player in df_merged["fullName"].unique():
-        try:
-            encoded_market64 = df_markets.loc[df_markets["fullName"] == player, "markets64"].iloc[0]
-        except IndexError:
+        encoded_market64 = markets_by_player.get(player)
+        if encoded_market64 is None:
             print(f"⚠️ No markets64 found for {player}")
             continue
-
-        print(f"🔍 Decoding {player} ...")
-        df_decoded = decode_market64(encoded_market64)
-        if df_decoded.empty:
-            print(f"⚠️ No decodable data for {player}")
-            continue
-        df_decoded["fullName"] = player
-        decoded_results.append(df_decoded)
-
-    if not decoded_results:
+        # Null payloads can come back from Parquet as NaN; only pass real bytes
+        payload = payloads_by_player.get(player)
+        payload = payload if isinstance(payload, (bytes, bytearray)) else None
+        jobs.append((player, encoded_market64, payload))
+
+    # Accumulate columns across players and build a single DataFrame at the end
+    num_ids, final_lines, top_values, names = [], [], [], []
+
+    # Each decode is pure CPU work, so spread players across processes
+    with ProcessPoolExecutor() as ex:
+        for player, (player_ids, player_lines, player_tops) in ex.map(_decode_one, jobs):
+            print(f"🔍 Decoded {player}")
+            if not player_ids:
+                print(f"⚠️ No decodable data for {player}")
+                continue
+            num_ids.extend(player_ids)
+            final_lines.extend(player_lines)
+            top_values.extend(player_tops)
+            names.extend([player] * len(player_ids))
+
+    if not num_ids:
         print("⚠️ No decoded results generated.")
         return pd.DataFrame()
 
-    df_lines = pd.concat(decoded_results, ignore_index=True)
+    df_lines = pd.DataFrame({
+        "numeric_id": num_ids,
+        "final_line": final_lines,
+        "top_values": top_values,
+        "fullName": names
+    })
 
     # ✅ Fix: Ensure consistent merge key type
     df_merged["numeric_id"] = df_merged["numeric_id"].astype(str)
     df_lines["numeric_id"] = df_lines["numeric_id"].astype(str)
 
-    # --- Merge Data ---
-    df_final = df_merged.merge(
-        df_lines,
-        how="left",
-        on=["fullName", "numeric_id"]
-    )[
+    # --- Merge Data (index join on the shared keys) ---
+    keys = ["fullName", "numeric_id"]
+    df_final = df_merged.set_index(keys).join(
+        df_lines.set_index(keys),
+        how="left"
+    ).reset_index()[
         ["fullName", "raw", "numeric_id", "category_name", "group", "sport", "final_line", "top_values"]
     ]
 
@@ -141,21 +197,23 @@ def run_marketline_decoding():
     merged_dir = Path("data/processed")
     odds_dir = Path("data/raw/odds")
 
-    latest_merged = get_latest_file(merged_dir, "player_category_map_*.json")
-    latest_odds_folder = max([d for d in odds_dir.iterdir() if d.is_dir()], key=lambda d: d.stat().st_mtime, default=None)
+    latest_merged = get_latest_file(merged_dir, "player_category_map_*.parquet")
+    with os.scandir(odds_dir) as it:
+        latest_odds = max(((e.stat().st_mtime, e.path) for e in it if e.is_dir()), default=None)
+    latest_odds_folder = Path(latest_odds[1]) if latest_odds else None
 
     if not latest_merged or not latest_odds_folder:
         print("❌ Missing required data files. Run previous pipelines first.")
         return
 
-    markets_file = latest_odds_folder / "odds_markets_raw.json"
+    markets_file = latest_odds_folder / "odds_markets_raw.parquet"
     print(f"📂 Using:\n  Merged → {latest_merged}\n  Markets → {markets_file}")
 
     try:
-        df_merged = pd.read_json(latest_merged)
-        df_markets = pd.read_json(markets_file)
+        df_merged = pl.read_parquet(latest_merged).to_pandas()
+        df_markets = pl.read_parquet(markets_file).to_pandas()
     except Exception as e:
-        print(f"❌ Error reading JSON files: {e}")
+        print(f"❌ Error reading Parquet files: {e}")
         return
 
     df_final = decode_all_players(df_merged, df_markets)
@@ -169,60 +227,41 @@ def run_marketline_decoding():
     output_path = output_dir / f"player_lines_final_{timestamp}.json"
     # --- Transform to user requested schema ---
     # Desired fields: id, market, player_name, decimal_odds
-    def map_market(category_name, group_name):
-        if not category_name:
-            return None
-        cn = category_name.lower()
-        gn = (group_name or "").lower()
-        # Heuristics to map various category names to canonical market types
-        if "points" in cn or "pts" in cn or "points" in gn:
-            return "player_points"
-        if "total" in cn or "over" in cn or "under" in cn or "total" in gn:
-            return "team_total"
-        if "money" in cn or "moneyline" in cn or "ml" in cn:
-            return "moneyline"
-        # fallback: slugify the category name
-        return cn.replace(" ", "_")
-
-    def pick_decimal_odds(top_values, final_line):
-        # Prefer the first top_value if it's a numeric (already decimal odds)
-        try:
-            if isinstance(top_values, (list, tuple)) and len(top_values) > 0:
-                v = top_values[0]
-                return float(v) if v is not None else None
-            # Fallback: if final_line looks like an odds value, return it
-            if final_line is not None:
-                return float(final_line)
-        except Exception:
-            return None
-        return None
 
     # Ensure required columns exist
-    for c in ["numeric_id", "category_name", "group", "fullName", "final_line", "top_values"]:
+    for c in ["raw", "numeric_id", "category_name", "group", "fullName", "final_line", "top_values"]:
         if c not in df_final.columns:
             df_final[c] = None
 
     # Build unique id as "raw-numeric_id". Fall back to whichever part exists.
-    def build_unique_id(row):
-        raw = row.get("raw")
-        nid = row.get("numeric_id")
-        # normalize strings
-        raw = None if (pd.isna(raw) or raw is None or str(raw).strip() == "") else str(raw)
-        nid = None if (pd.isna(nid) or nid is None or str(nid).strip() == "" or str(nid) == "nan") else str(nid)
-        if raw and nid:
-            return f"{raw}-{nid}"
-        if raw:
-            return raw
-        if nid:
-            return nid
-        return None
+    raw = df_final["raw"].astype("string")
+    raw = raw.mask(raw.str.strip() == "")
+    nid = df_final["numeric_id"].astype("string")
+    nid = nid.mask((nid.str.strip() == "") | (nid == "nan"))
+    df_final["id"] = (raw + "-" + nid).fillna(raw).fillna(nid)
+
+    # Heuristics to map various category names to canonical market types
+    cn = df_final["category_name"].astype("string").str.lower()
+    gn = df_final["group"].astype("string").fillna("").str.lower()
+    conds = [
+        cn.str.contains("points|pts", na=False) | gn.str.contains("points"),
+        cn.str.contains("total|over|under", na=False) | gn.str.contains("total"),
+        cn.str.contains("money|ml", na=False),
+    ]
+    # fallback: slugify the category name
+    slug = cn.str.replace(" ", "_").to_numpy(dtype=object)
+    market = np.select(conds, ["player_points", "team_total", "moneyline"], default=slug)
+    df_final["market"] = pd.Series(market, index=df_final.index).where(cn.fillna("") != "", None)
 
-    df_final["id"] = df_final.apply(build_unique_id, axis=1)
-    df_final["market"] = df_final.apply(lambda r: map_market(r.get("category_name"), r.get("group")), axis=1)
     df_final["player_name"] = df_final.get("fullName")
-    df_final["decimal_odds"] = df_final.apply(lambda r: pick_decimal_odds(r.get("top_values"), r.get("final_line")), axis=1)
 
-    df_out = df_final[["id", "market", "player_name", "decimal_odds"]].copy()
+    # Prefer the first top_value (already decimal odds), else fall back to final_line
+    df_final["decimal_odds"] = (
+        df_final["top_values"].str[0].astype(float)
+        .fillna(df_final["final_line"].astype(float))
+    )
+
+    df_out = df_final[["id", "market", "player_name", "decimal_odds"]]
 
     try:
         df_out.to_json(output_path, orient='records', indent=2)
@@ -1,5 +1,7 @@
 from curl_cffi import requests
+import orjson
 import pandas as pd
+import polars as pl
 from pathlib import Path
 from datetime import datetime
 
@@ -35,7 +37,7 @@ def fetch_category_names():
     try:
         response = requests.get(API_URL, headers=HEADERS, impersonate="chrome", timeout=20)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
     except requests.RequestsError as e:
         print(f"❌ Network error: {e}")
         return pd.DataFrame()
@@ -53,18 +55,20 @@ def fetch_category_names():
         print("⚠️ No sports data found in system response.")
         return pd.DataFrame()
 
-    records = []
-    for sport in sports:
-        sport_name = sport.get("name", "Unknown")
-        for cat in sport.get("categories", []):
-            records.append({
-                "category_id": cat.get("id"),
-                "category_name": cat.get("name", "Unnamed Category"),
-                "group": cat.get("groupName", "Unknown"),
-                "sport": sport_name
-            })
-
-    df = pd.DataFrame(records)
+    # Flatten sports -> categories in one pass, carrying the sport name along
+    df = pd.json_normalize(
+        [sport for sport in sports if sport.get("categories")],
+        record_path="categories",
+        meta=["name"],
+        meta_prefix="sport_",
+        errors="ignore"
+    )
+    if not df.empty:
+        df = (
+            df.reindex(columns=["id", "name", "groupName", "sport_name"])
+            .rename(columns={"id": "category_id", "name": "category_name", "groupName": "group", "sport_name": "sport"})
+            .fillna({"category_name": "Unnamed Category", "group": "Unknown", "sport": "Unknown"})
+        )
     if df.empty:
         print("⚠️ No categories found in parsed data.")
     else:
@@ -84,13 +88,13 @@ def save_category_data(df_categories):
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     output_dir = Path(f"data/raw/category_names/{timestamp}")
     output_dir.mkdir(parents=True, exist_ok=True)
-    output_file = output_dir / "category_names_raw.json"
+    output_file = output_dir / "category_names_raw.parquet"
 
     try:
-        df_categories.to_json(output_file, orient='records', indent=2)
+        pl.from_pandas(df_categories).write_parquet(output_file)
         print(f"📁 Saved category names to {output_file}")
     except Exception as e:
-        print(f"❌ Failed to save category names JSON: {e}")
+        print(f"❌ Failed to save category names Parquet: {e}")
 
 
 # =====================================================
@@ -1,10 +1,14 @@
 from curl_cffi import requests
+import orjson
 import base64
 import zlib
 import re
+import os
 import pandas as pd
+import polars as pl
 from datetime import datetime
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 
 # =====================================================
@@ -21,6 +25,9 @@ HEADERS = {
     'privy-id-token': 'YOUR_TOKEN_HERE'  # 🔐 Replace with active token
 }
 
+_CAT_RE = re.compile(rb'Z2lkOi8vaHMzL0NhdGVnb3J5Lz[A-Za-z0-9+/=]+')
+_NUMID_RE = re.compile(r'/Category/(\d+)')
+
 
 # =====================================================
 # 1️⃣ --- Fetch Odds Info ---
@@ -59,7 +66,7 @@ def fetch_odds_info():
     try:
         response = requests.post(API_URL, headers=HEADERS, json=payload, impersonate="chrome", timeout=20)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
     except Exception as e:
         print(f"❌ Error fetching odds info: {e}")
         return pd.DataFrame()
@@ -95,21 +102,27 @@ def fix_base64_padding(s: str) -> str:
     return s + "=" * (-len(s) % 4)
 
 
-def decode_markets64_and_extract_categories(encoded_market64):
-    """Decode one markets64 string and extract all category IDs."""
+def decompress_markets64(encoded_market64):
+    """Base64-decode and zlib-inflate one markets64 string (None if undecodable)."""
     if not encoded_market64:
-        return []
+        return None
 
     try:
         decoded = base64.b64decode(encoded_market64)
         try:
-            decompressed = zlib.decompress(decoded)
+            return zlib.decompress(decoded)
         except:
-            decompressed = decoded
+            return decoded
     except Exception:
+        return None
+
+
+def extract_categories(decompressed):
+    """Extract all category IDs from an inflated markets64 payload."""
+    if decompressed is None:
         return []
 
-    category_ids = re.findall(rb'Z2lkOi8vaHMzL0NhdGVnb3J5Lz[A-Za-z0-9+/=]+', decompressed)
+    category_ids = _CAT_RE.findall(decompressed)
     category_ids = [cid.decode(errors="ignore") for cid in category_ids]
 
     decoded_rows = []
@@ -119,7 +132,7 @@ def decode_markets64_and_extract_categories(encoded_market64):
             decoded_val = base64.b64decode(padded).decode()
         except Exception:
             decoded_val = "(invalid base64)"
-        numeric_id = re.search(r'/Category/(\d+)', decoded_val)
+        numeric_id = _NUMID_RE.search(decoded_val)
         decoded_rows.append({
             "raw": cid,
             "decoded": decoded_val,
@@ -129,20 +142,29 @@ def decode_markets64_and_extract_categories(encoded_market64):
 
 
 def build_category_dataframe(df_markets):
-    """Decode all player markets64 values into a combined category DataFrame."""
+    """Decode all player markets64 values into a combined category DataFrame.
+
+    The inflated payloads are kept on df_markets as `markets_bytes` so the
+    market line decoder can skip base64 + zlib on the same data.
+    """
     if df_markets.empty:
         print("⚠️ No odds info available to decode.")
         return pd.DataFrame()
 
+    players = [
+        full_name or first_name or "Unknown"
+        for full_name, first_name in zip(df_markets["fullName"].to_numpy(), df_markets["firstName"].to_numpy())
+    ]
+
+    # zlib.decompress releases the GIL, so inflation runs in parallel across threads
+    # (the base64 decode on the same threads still holds it)
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+        payloads = list(ex.map(decompress_markets64, df_markets["markets64"].tolist()))
+    df_markets["markets_bytes"] = payloads
+
     all_records = []
-    for _, row in df_markets.iterrows():
-        player = row.get("fullName") or row.get("firstName") or "Unknown"
-        encoded_market64 = row.get("markets64", "")
-        if not encoded_market64:
-            continue
-
-        decoded_rows = decode_markets64_and_extract_categories(encoded_market64)
-        for r in decoded_rows:
+    for player, payload in zip(players, payloads):
+        for r in extract_categories(payload):
             all_records.append({
                 "fullName": player,
                 "raw": r["raw"],
@@ -165,11 +187,11 @@ def save_odds_data(df_markets, df_all_categories):
     base_dir.mkdir(parents=True, exist_ok=True)
 
     try:
-        df_markets.to_json(base_dir / "odds_markets_raw.json", orient='records', indent=2)
-        df_all_categories.to_json(base_dir / "odds_categories_decoded.json", orient='records', indent=2)
+        pl.from_pandas(df_markets).write_parquet(base_dir / "odds_markets_raw.parquet")
+        pl.from_pandas(df_all_categories).write_parquet(base_dir / "odds_categories_decoded.parquet")
         print(f"📁 Saved data to {base_dir}")
     except Exception as e:
-        print(f"❌ Failed to save JSON files: {e}")
+        print(f"❌ Failed to save Parquet files: {e}")
 
 
 # =====================================================